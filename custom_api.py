@@ -4,20 +4,35 @@ Image Extractor API
 A FastAPI application for extracting high-resolution product images from web pages.
 """
 
-from fastapi import FastAPI, HTTPException, Depends, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder
+from starlette.types import Message, Receive, Scope, Send
 from fastapi.openapi.utils import get_openapi
 from pydantic import BaseModel, HttpUrl, Field
+from contextlib import asynccontextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor
+import httpx
+import hashlib
+import orjson
+import multiprocessing
 import os
 import uuid
 from typing import Dict, Any, Optional, List, Union
 import logging
 import uvicorn
 import time
+import gradio as gr
 
 # Import from our refactored image_extractor module
-from image_extractor import extract_images_from_url, download_image, process_product_page
+from image_extractor import (
+    extract_images_from_url, download_image, process_product_page, WebPageFetcher, ExtractionResult
+)
+import gradio_app
+from gradio_app import create_interface
 
 # Configure logging
 logging.basicConfig(
@@ -26,6 +41,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Server layout, read from the environment so every worker process agrees on it.
+# Auto-reload only supports a single worker, so it is opt-in for development.
+RELOAD = os.getenv("API_RELOAD", "").lower() in ("1", "true", "yes")
+# Gradio keeps its queue and sessions in process memory, so a mounted UI needs a
+# single worker; set API_MOUNT_GRADIO=0 to scale the API out across workers.
+MOUNT_GRADIO = os.getenv("API_MOUNT_GRADIO", "1").lower() in ("1", "true", "yes")
+WORKERS = 1 if RELOAD or MOUNT_GRADIO else (os.cpu_count() or 2) * 2 + 1
+
+# Parsing processes per server worker: a lone worker parses on every core, while
+# several workers already spread load across cores and keep a small pool each
+PARSE_POOL_SIZE = (os.cpu_count() or 1) if WORKERS == 1 else 2
+
 # Define API Models
 class ExtractImageRequest(BaseModel):
     """Request model for image extraction"""
@@ -62,6 +89,34 @@ class ErrorResponse(BaseModel):
     """Error response model"""
     detail: str
 
+# Shared HTTP client lifecycle
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Keep one pooled HTTP client and parsing pool open for the lifetime of the application"""
+    # Use the fetcher's shared client so the mounted Gradio UI draws from the same pool
+    app.state.http = WebPageFetcher.get_client()
+    # HTML parsing is CPU bound, so keep it off the event loop in separate processes.
+    # forkserver avoids forking a process that already runs threads and an event loop.
+    app.state.parse_pool = ProcessPoolExecutor(
+        max_workers=PARSE_POOL_SIZE,
+        mp_context=multiprocessing.get_context("forkserver")
+    )
+    # The mounted Gradio UI extracts in-process, so it parses on the same pool
+    if MOUNT_GRADIO:
+        gradio_app.parse_executor = app.state.parse_pool
+    yield
+    gradio_app.parse_executor = None
+    await WebPageFetcher.close_client()
+    app.state.parse_pool.shutdown()
+
+async def get_http_client(request: Request) -> httpx.AsyncClient:
+    """Dependency providing the application's shared HTTP client"""
+    return request.app.state.http
+
+async def get_parse_pool(request: Request) -> Executor:
+    """Dependency providing the application's HTML parsing process pool"""
+    return request.app.state.parse_pool
+
 # Create API application
 app = FastAPI(
     title="Image Extractor API",
@@ -70,6 +125,8 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     responses={
         500: {"model": ErrorResponse}
     }
@@ -84,6 +141,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class EventStreamGZipResponder(GZipResponder):
+    """GZip responder that sends server-sent event streams through uncompressed"""
+
+    async def send_with_gzip(self, message: Message) -> None:
+        await super().send_with_gzip(message)
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            if content_type.startswith("text/event-stream"):
+                # The gzip stream is only flushed at the end, which would hold back
+                # every event; reuse the pass-through path for pre-encoded bodies
+                self.content_encoding_set = True
+
+class EventStreamGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that leaves text/event-stream responses, such as Gradio's queue, uncompressed"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = EventStreamGZipResponder(
+                self.app, self.minimum_size, compresslevel=self.compresslevel
+            )
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+# Compress larger responses such as /extract results
+app.add_middleware(EventStreamGZipMiddleware, minimum_size=500)
+
 # Custom OpenAPI schema
 def custom_openapi():
     if app.openapi_schema:
@@ -123,10 +207,30 @@ async def log_requests(request: Request, call_next):
     
     return response
 
+# Helper functions
+def compute_extract_etag(extraction_result: ExtractionResult) -> str:
+    """Compute a weak ETag from the extracted content, ignoring the per-request ID"""
+    content = {
+        "images": [[info.url, info.alt, info.type] for info in extraction_result.images.values()],
+        "measurements": extraction_result.measurements,
+        "materials": extraction_result.materials,
+    }
+    digest = hashlib.sha1(orjson.dumps(content, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    return f'W/"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check whether an If-None-Match header matches the given ETag using weak comparison"""
+    if not if_none_match:
+        return False
+    opaque_tag = etag.removeprefix("W/")
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or opaque_tag in candidates
+
 # API Routes
 @app.get("/", summary="Welcome endpoint", tags=["General"])
-def read_root():
+def read_root(response: Response):
     """Welcome endpoint for the API"""
+    response.headers["Cache-Control"] = "public, max-age=3600"
     return {"message": "Welcome to the Image Extractor API"}
 
 @app.post(
@@ -134,12 +238,19 @@ def read_root():
     response_model=ExtractImageResponse,
     responses={
         200: {"description": "Successfully extracted images"},
+        412: {"description": "URL-only result matches the ETag sent in If-None-Match"},
         500: {"description": "Server error", "model": ErrorResponse}
     },
     summary="Extract images from a URL",
     tags=["Extraction"]
 )
-async def extract_images(request: ExtractImageRequest):
+async def extract_images(
+    request: ExtractImageRequest,
+    http_request: Request,
+    response: Response,
+    http_client: httpx.AsyncClient = Depends(get_http_client),
+    parse_pool: Executor = Depends(get_parse_pool)
+):
     """
     Extract high-resolution images from a product URL.
     
@@ -148,6 +259,8 @@ async def extract_images(request: ExtractImageRequest):
     - **custom_output_dir**: Optional custom directory to save images to
     
     Returns information about extracted images and product measurements.
+    URL-only results carry a weak ETag of the extracted content; repeat
+    requests sending it in If-None-Match get a 412 while it is unchanged.
     """
     try:
         logger.info(f"Processing extraction request for URL: {request.url}")
@@ -156,36 +269,36 @@ async def extract_images(request: ExtractImageRequest):
         if request.download_images:
             # Process the page and download images
             logger.info(f"Downloading images to {'custom directory' if request.custom_output_dir else 'default directory'}")
-            result = process_product_page(url, request.custom_output_dir)
+            result = await process_product_page(
+                url, request.custom_output_dir, http_client, parse_pool
+            )
             return result
         else:
             # Only extract image URLs without downloading
             logger.info("Extracting image URLs without downloading")
-            extraction_result = extract_images_from_url(url)
+            extraction_result = await extract_images_from_url(url, http_client, parse_pool)
+            
+            # RFC 9110 answers a matching If-None-Match on methods other than GET/HEAD with 412
+            etag = compute_extract_etag(extraction_result)
+            if etag_matches(http_request.headers.get("if-none-match"), etag):
+                return Response(status_code=412, headers={"ETag": etag})
+            response.headers["ETag"] = etag
             
             # Convert the result to match our response model
-            return {
-                "request_id": extraction_result.request_id if hasattr(extraction_result, 'request_id') else extraction_result["requestId"],
-                "images": {
+            return ExtractImageResponse(
+                request_id=extraction_result.request_id,
+                images={
                     img_id: {
                         "id": img_id,
-                        "url": img_info["url"] if isinstance(img_info, dict) else img_info.url,
-                        "alt": img_info["alt"] if isinstance(img_info, dict) else img_info.alt,
-                        "type": img_info["type"] if isinstance(img_info, dict) else img_info.type
-                    } 
-                    for img_id, img_info in (extraction_result.images.items() if hasattr(extraction_result, 'images') else extraction_result["images"].items())
+                        "url": img_info.url,
+                        "alt": img_info.alt,
+                        "type": img_info.type
+                    }
+                    for img_id, img_info in extraction_result.images.items()
                 },
-                "measurements": (
-                    extraction_result.measurements 
-                    if hasattr(extraction_result, 'measurements') 
-                    else extraction_result.get("measurements", {})
-                ),
-                "materials": (
-                    extraction_result.materials 
-                    if hasattr(extraction_result, 'materials') 
-                    else extraction_result.get("materials", {})
-                ),
-            }
+                measurements=extraction_result.measurements,
+                materials=extraction_result.materials,
+            )
 
     except Exception as e:
         logger.error(f"Error processing URL: {str(e)}", exc_info=True)
@@ -195,15 +308,30 @@ async def extract_images(request: ExtractImageRequest):
         )
 
 @app.get("/health", summary="Health check endpoint", tags=["Monitoring"])
-def health_check():
+def health_check(response: Response):
     """
     Health check endpoint for monitoring the API status.
     
     Returns a simple status message indicating the API is healthy.
     """
+    response.headers["Cache-Control"] = "no-store"
     return {"status": "healthy", "timestamp": time.time()}
 
+# Serve the Gradio UI from the same process and event loop. Gradio >= 4.9 chains
+# its queue startup into the lifespan above; older releases rely on startup
+# events, which Starlette skips once a lifespan is set.
+if MOUNT_GRADIO:
+    app = gr.mount_gradio_app(app, create_interface(), path="/gradio")
+
 # Run the server directly if the file is executed
 if __name__ == "__main__":
     logger.info("Starting Image Extractor API server")
-    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run(
+        "custom_api:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=RELOAD,
+        workers=WORKERS,
+        loop="uvloop",
+        http="httptools",
+    )
@@ -5,17 +5,22 @@ This module extracts high-resolution product images and measurements from web pa
 Designed primarily for IKEA product pages but can be extended for other sites.
 """
 
+import asyncio
+import codecs
+import mimetypes
 import uuid
 import re
 import os
 import logging
-from typing import Dict, Any, Optional, List, Tuple
-from dataclasses import dataclass, field
+import threading
+from concurrent.futures import Executor
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple, NamedTuple, Callable, Awaitable, TypeVar, Union
+from dataclasses import dataclass, field, replace
 
-import requests
-from bs4 import BeautifulSoup
-from PIL import Image
-from io import BytesIO
+import httpx
+from selectolax.lexbor import LexborHTMLParser, LexborNode
+from cachetools import TTLCache
 
 
 # Configure logging
@@ -25,8 +30,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
 
-@dataclass
+# Numeric part of a srcset descriptor such as "900w" or "2x"
+_DIGIT_RE = re.compile(r'(\d+)')
+
+
+def _descriptor_width(descriptor: str) -> int:
+    """Return the numeric value of a srcset descriptor, or 0 if it has none"""
+    # Width descriptors like IKEA's "900w" are by far the most common, so skip the regex for them
+    number = descriptor[:-1]
+    if descriptor[-1:] == 'w' and number.isdecimal():
+        return int(number)
+    match = _DIGIT_RE.search(descriptor)
+    return int(match.group(1)) if match else 0
+
+
+@dataclass(slots=True)
 class ImageInfo:
     """Class for storing image information"""
     url: str
@@ -36,7 +56,7 @@ class ImageInfo:
     id: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ExtractionResult:
     """Class for storing the results of a webpage extraction"""
     request_id: str
@@ -65,48 +85,67 @@ class ExtractionResult:
             "output_dir": self.output_dir
         }
 
+    def with_request_id(self, request_id: str) -> "ExtractionResult":
+        """Return an independent copy of this result re-keyed under a new request ID"""
+        images = {}
+        for img_id, img_info in self.images.items():
+            new_id = request_id + img_id[len(self.request_id):]
+            images[new_id] = replace(img_info, id=new_id)
+
+        return replace(
+            self,
+            request_id=request_id,
+            images=images,
+            measurements=dict(self.measurements),
+            materials=dict(self.materials)
+        )
+
+
+class SrcsetEntry(NamedTuple):
+    """Single image candidate parsed from a srcset attribute"""
+    url: str
+    descriptor: str
+    width: int
+
 
 class SrcsetParser:
     """Helper class for parsing srcset attributes from HTML img tags"""
     
     @staticmethod
-    def parse_srcset(srcset: str) -> List[Dict[str, Any]]:
+    @lru_cache(maxsize=256)
+    def parse_srcset(srcset: str) -> Tuple[SrcsetEntry, ...]:
         """
-        Parse a srcset attribute into a structured list of image URLs and descriptors.
+        Parse a srcset attribute into a structured sequence of image URLs and descriptors.
+        
+        Results are cached per srcset string, since product pages often repeat
+        the same srcset across thumbnails; the returned tuple is immutable so it
+        is safe to share.
         
         Args:
             srcset: The srcset attribute from an img tag
             
         Returns:
-            List of dictionaries containing parsed srcset components
+            Tuple of SrcsetEntry tuples containing parsed srcset components
         """
         if not srcset:
-            return []
-        
-        results = []
-        srcset_parts = [part.strip() for part in srcset.split(',')]
+            return ()
         
-        for part in srcset_parts:
-            parts = part.split()
-            if len(parts) < 2:
-                continue
-                
-            url = parts[0]
-            descriptor = parts[1]
-            
-            try:
-                width = int(re.search(r'\d+', descriptor).group(0)) if re.search(r'\d+', descriptor) else 0
-                results.append({"url": url, "descriptor": descriptor, "width": width})
-            except (AttributeError, ValueError):
-                continue
-                
-        return results
+        # Only the trailing token of each candidate is the descriptor
+        candidates = (part.strip().rsplit(None, 1) for part in srcset.split(','))
+        return tuple(
+            SrcsetEntry(candidate[0], candidate[1], _descriptor_width(candidate[1]))
+            for candidate in candidates
+            if len(candidate) == 2
+        )
     
-    @classmethod
-    def extract_f_xl_image(cls, srcset: str) -> Optional[str]:
+    @staticmethod
+    def extract_f_xl_image(srcset: str) -> Optional[str]:
         """
         Extract specifically the image URL with f=xl 900w from a srcset attribute.
         
+        Preference order is f=xl 900w, then any 900w, then the widest image,
+        resolved in a single pass over the srcset.
+        
         Args:
             srcset: The srcset attribute from an img tag
             
@@ -116,56 +155,104 @@ class SrcsetParser:
         if not srcset:
             return None
         
-        srcset_entries = cls.parse_srcset(srcset)
-        
-        # First, look for f=xl with 900w
-        for entry in srcset_entries:
-            if "f=xl" in entry["url"] and entry["descriptor"] == "900w":
-                return entry["url"]
+        any_900_url = None
+        widest_url = None
+        widest_width = -1
         
-        # If not found, try any 900w image
-        for entry in srcset_entries:
-            if entry["descriptor"] == "900w":
-                return entry["url"]
-        
-        # Finally, fall back to highest resolution
-        if srcset_entries:
-            srcset_entries.sort(key=lambda x: x["width"], reverse=True)
-            return srcset_entries[0]["url"]
+        for part in srcset.split(','):
+            parts = part.strip().rsplit(None, 1)
+            if len(parts) < 2:
+                continue
+            
+            url, descriptor = parts
+            if descriptor == "900w":
+                # An f=xl 900w image is the best possible match
+                if "f=xl" in url:
+                    return url
+                if any_900_url is None:
+                    any_900_url = url
+            
+            width = _descriptor_width(descriptor)
+            if width > widest_width:
+                widest_url, widest_width = url, width
         
-        return None
+        # Otherwise prefer any 900w image, then fall back to highest resolution
+        return any_900_url if any_900_url is not None else widest_url
 
 
 class ImageDownloader:
     """Helper class for downloading images"""
     
+    # Upper bound on simultaneous downloads so we don't hammer the image CDN
+    MAX_CONCURRENT_DOWNLOADS = 8
+    
+    # Image bodies are written to disk in chunks of this size instead of being buffered
+    DOWNLOAD_CHUNK_SIZE = 1 << 16
+    
+    @staticmethod
+    def _needs_conversion(content_type: str, save_path: str) -> bool:
+        """Check whether the served image format differs from the one implied by save_path"""
+        served_type = content_type.split(';', 1)[0].strip().lower()
+        target_type, _ = mimetypes.guess_type(save_path)
+        return served_type.startswith('image/') and target_type is not None and served_type != target_type
+    
     @staticmethod
-    def download_image(image_url: str, save_path: str) -> Optional[str]:
+    def _convert_image(content: bytes, save_path: str) -> None:
+        """Re-encode image bytes into the format implied by save_path"""
+        # Pillow is only needed for conversions, so keep it off the import path
+        from io import BytesIO
+        from PIL import Image
+        
+        img = Image.open(BytesIO(content))
+        img.save(save_path)
+    
+    @classmethod
+    async def _stream_to_file(cls, response: httpx.Response, save_path: str) -> None:
+        """Write a streamed response body to save_path chunk by chunk, off the event loop"""
+        loop = asyncio.get_running_loop()
+        f = await loop.run_in_executor(None, open, save_path, 'wb')
+        try:
+            async for chunk in response.aiter_bytes(cls.DOWNLOAD_CHUNK_SIZE):
+                await loop.run_in_executor(None, f.write, chunk)
+        except BaseException:
+            # Don't leave a truncated image behind
+            await loop.run_in_executor(None, f.close)
+            os.remove(save_path)
+            raise
+        await loop.run_in_executor(None, f.close)
+    
+    @classmethod
+    async def download_image(
+        cls, image_url: str, save_path: str, client: Optional[httpx.AsyncClient] = None
+    ) -> Optional[str]:
         """
         Download an image from URL and save it to disk.
         
         Args:
             image_url: URL of the image to download
-            save_path: Path where the image will be saved
+            save_path: Path where the image will be saved; its directory must exist
+            client: Optional HTTP client to use instead of the shared one
             
         Returns:
             The path to the saved image or None if download failed
         """
         try:
-            # Create directory if it doesn't exist
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            
-            # Get the image content
-            response = requests.get(image_url, timeout=30)
-            response.raise_for_status()
-            
-            # Save the image
-            img = Image.open(BytesIO(response.content))
-            img.save(save_path)
+            # Stream the image over the shared connection pool
+            async with (client or WebPageFetcher.get_client()).stream("GET", image_url) as response:
+                response.raise_for_status()
+                
+                content_type = response.headers.get('content-type', '')
+                if cls._needs_conversion(content_type, save_path):
+                    # Re-encoding needs the whole image, so only this case is buffered
+                    content = await response.aread()
+                    loop = asyncio.get_running_loop()
+                    await loop.run_in_executor(None, cls._convert_image, content, save_path)
+                else:
+                    await cls._stream_to_file(response, save_path)
             
             logger.info(f"Image saved to {save_path}")
             return save_path
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Error downloading image: {e}")
             return None
         except IOError as e:
@@ -174,6 +261,30 @@ class ImageDownloader:
         except Exception as e:
             logger.error(f"Unexpected error while downloading image: {e}")
             return None
+    
+    @classmethod
+    async def download_images(
+        cls, downloads: List[Tuple[str, str]], client: Optional[httpx.AsyncClient] = None
+    ) -> List[Optional[str]]:
+        """
+        Download several images concurrently.
+        
+        Args:
+            downloads: List of (image_url, save_path) pairs
+            client: Optional HTTP client to use instead of the shared one
+            
+        Returns:
+            List of saved paths (or None for failed downloads) in input order
+        """
+        semaphore = asyncio.Semaphore(cls.MAX_CONCURRENT_DOWNLOADS)
+        
+        async def bounded_download(image_url: str, save_path: str) -> Optional[str]:
+            async with semaphore:
+                return await cls.download_image(image_url, save_path, client)
+        
+        return await asyncio.gather(
+            *(bounded_download(image_url, save_path) for image_url, save_path in downloads)
+        )
 
 
 class WebPageFetcher:
@@ -183,91 +294,251 @@ class WebPageFetcher:
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
     
+    # Keep idle connections to the upstream CDN alive between successive fetches
+    CONNECTION_LIMITS = httpx.Limits(
+        max_keepalive_connections=20,
+        max_connections=40,
+        keepalive_expiry=30.0
+    )
+    
+    # Transient connection failures are retried before giving up
+    CONNECT_RETRIES = 3
+    
+    # Pages are streamed and cut off past this size to bound memory per request
+    MAX_PAGE_BYTES = 5_000_000
+    
+    # Pooled connections are bound to the event loop that opened them, so the
+    # shared client is replaced whenever it is used from a different loop
+    _client: Optional[httpx.AsyncClient] = None
+    _client_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    @classmethod
+    def create_client(cls) -> httpx.AsyncClient:
+        """Create a new async HTTP client with the fetcher's default configuration"""
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=cls.CONNECTION_LIMITS,
+            retries=cls.CONNECT_RETRIES
+        )
+        return httpx.AsyncClient(
+            headers=cls.DEFAULT_HEADERS,
+            timeout=30.0,
+            transport=transport,
+            follow_redirects=True
+        )
+    
+    @classmethod
+    def get_client(cls) -> httpx.AsyncClient:
+        """Return the shared async HTTP client for the running event loop, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        if cls._client is None or cls._client.is_closed or cls._client_loop is not loop:
+            cls._client = cls.create_client()
+            cls._client_loop = loop
+        return cls._client
+    
     @classmethod
-    def fetch_page(cls, url: str) -> Tuple[str, BeautifulSoup]:
+    async def close_client(cls) -> None:
+        """Close the shared async HTTP client if it was created on the running event loop"""
+        if cls._client is not None and cls._client_loop is asyncio.get_running_loop():
+            await cls._client.aclose()
+        cls._client = None
+        cls._client_loop = None
+    
+    @classmethod
+    async def fetch_html(cls, url: str, client: Optional[httpx.AsyncClient] = None) -> bytes:
         """
-        Fetch a web page and return its content as text and parsed BeautifulSoup.
+        Fetch a web page and return its body as UTF-8 encoded bytes.
+        
+        The body is streamed and truncated after MAX_PAGE_BYTES. It is kept as
+        bytes so the parser can consume it directly without a str copy; pages
+        served in another charset are transcoded to UTF-8 first.
         
         Args:
             url: The URL to fetch
+            client: Optional HTTP client to use instead of the shared one
             
         Returns:
-            Tuple containing (raw_html, parsed_soup)
+            The raw HTML of the page as UTF-8 bytes
             
         Raises:
-            requests.exceptions.RequestException: If the request fails
+            httpx.HTTPError: If the request fails
         """
         logger.info(f"Fetching page: {url}")
-        response = requests.get(url, headers=cls.DEFAULT_HEADERS, timeout=30)
-        response.raise_for_status()
-        html = response.text
+        async with (client or cls.get_client()).stream("GET", url) as response:
+            response.raise_for_status()
+            
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > cls.MAX_PAGE_BYTES:
+                    logger.warning(f"Page exceeds {cls.MAX_PAGE_BYTES} bytes, truncating: {url}")
+                    chunks[-1] = chunk[:len(chunk) - (size - cls.MAX_PAGE_BYTES)]
+                    break
+            
+            content = b"".join(chunks)
+            # httpx only reports charsets Python knows, falling back to UTF-8
+            if codecs.lookup(response.encoding).name not in ("utf-8", "ascii"):
+                content = content.decode(response.encoding, errors="replace").encode("utf-8")
+            return content
+    
+    @classmethod
+    async def fetch_page(cls, url: str, client: Optional[httpx.AsyncClient] = None) -> LexborHTMLParser:
+        """
+        Fetch a web page and return the parsed HTML tree.
+        
+        Args:
+            url: The URL to fetch
+            client: Optional HTTP client to use instead of the shared one
+            
+        Returns:
+            The parsed HTML tree
+            
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        html = await cls.fetch_html(url, client)
         
-        # Parse HTML with BeautifulSoup
-        soup = BeautifulSoup(html, 'html.parser')
-        return html, soup
+        # Parse HTML off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, LexborHTMLParser, html)
 
 
 class ProductExtractor:
     """Main class for extracting product information"""
     
+    # Repeat requests for the same URL reuse the previous extraction for a while
+    CACHE_MAX_SIZE = 512
+    CACHE_TTL_SECONDS = 600
+    
+    # Pages processed at once by process_product_pages
+    MAX_CONCURRENT_PAGES = 16
+    
+    # CSS selectors used by the extract steps
+    _SEL_MAIN_IMG = 'div[data-type="MAIN_PRODUCT_IMAGE"] img.pip-image'
+    _SEL_MEASURE_IMG = 'div[data-type="MEASUREMENT_ILLUSTRATION"] img.pip-image'
+    _SEL_SRCSET_IMG = 'img[srcset]'
+    _SEL_DIMS_UL = 'ul.pip-product-dimensions__dimensions-container'
+    _SEL_DIMS_LABELS = (
+        'li.pip-product-dimensions__measurement-wrapper '
+        'span.pip-product-dimensions__measurement-name'
+    )
+    _SEL_DETAILS = 'div.pip-product-details__container'
+    _SEL_DETAILS_HEADERS = 'h3, h4'
+    
     def __init__(self):
         self.srcset_parser = SrcsetParser()
         self.image_downloader = ImageDownloader()
+        self._result_cache = TTLCache(maxsize=self.CACHE_MAX_SIZE, ttl=self.CACHE_TTL_SECONDS)
+        self._download_cache = TTLCache(maxsize=self.CACHE_MAX_SIZE, ttl=self.CACHE_TTL_SECONDS)
+        # TTLCache is not thread-safe and the *_sync wrappers may run on several threads
+        self._cache_lock = threading.Lock()
     
-    def extract_images_from_url(self, url: str) -> ExtractionResult:
+    async def extract_images_from_url(
+        self,
+        url: str,
+        client: Optional[httpx.AsyncClient] = None,
+        executor: Optional[Executor] = None,
+        extract_measurements: bool = True
+    ) -> ExtractionResult:
         """
         Extract images with preference for f=xl 900w versions from a URL.
         
         Args:
             url: The URL to extract images from
+            client: Optional HTTP client to use instead of the shared one
+            executor: Optional executor (e.g. a process pool) to parse the page in;
+                defaults to the event loop's thread pool
+            extract_measurements: Whether to also extract product measurements
             
         Returns:
             ExtractionResult object with extracted image information
             
         Raises:
-            requests.exceptions.RequestException: If the request fails
+            httpx.HTTPError: If the request fails
             ValueError: If the HTML cannot be parsed correctly
         """
         try:
             logger.info(f"Extracting images from: {url}")
             
+            cache_key = (url, extract_measurements)
+            with self._cache_lock:
+                cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Using cached extraction for: {url}")
+                return cached.with_request_id(str(uuid.uuid4()))
+            
             # Fetch the HTML content
-            _, soup = WebPageFetcher.fetch_page(url)
+            html = await WebPageFetcher.fetch_html(url, client)
             
             # Generate a UUID for this request
             request_uuid = str(uuid.uuid4())
             logger.info(f"Generated request ID: {request_uuid}")
             
-            # Initialize result
-            result = ExtractionResult(request_id=request_uuid)
-
-            # Extract images
-            self._extract_main_product_image(soup, result, request_uuid)
-            self._extract_measurement_image(soup, result, request_uuid)
-            
-            # If no specific images found, try general approach
-            if not result.images:
-                self._extract_images_general_approach(soup, result, request_uuid)
-
-            # Extract measurements
-            self._extract_measurements(soup, result)
+            # Parse and extract off the event loop
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                executor, parse_and_extract, html, request_uuid, extract_measurements
+            )
 
             logger.info(f"Total images found: {len(result.images)}")
             logger.info(f"Measurements extracted: {result.measurements}")
+            
+            # Cache a private copy since callers mutate the returned result
+            with self._cache_lock:
+                self._result_cache[cache_key] = result.with_request_id(request_uuid)
             return result
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching URL: {e}")
             raise
         except Exception as e:
             logger.error(f"Error extracting images: {e}")
             raise
     
-    def _extract_main_product_image(self, soup: BeautifulSoup, result: ExtractionResult, request_uuid: str) -> None:
+    def extract_from_html(
+        self, html: bytes, request_uuid: str, extract_measurements: bool = True
+    ) -> ExtractionResult:
+        """
+        Parse page HTML and extract product images, measurements and materials.
+        
+        Args:
+            html: The raw HTML of the product page as UTF-8 bytes
+            request_uuid: Request ID used to key the extracted images
+            extract_measurements: Whether to also extract product measurements
+            
+        Returns:
+            ExtractionResult object with extracted image information
+        """
+        # Parse HTML with selectolax's Lexbor backend
+        tree = LexborHTMLParser(html)
+        
+        # Initialize result
+        result = ExtractionResult(request_id=request_uuid)
+
+        # Extract images
+        self._extract_main_product_image(tree, result, request_uuid)
+        self._extract_measurement_image(tree, result, request_uuid)
+        
+        # If no specific images found, try general approach
+        if not result.images:
+            self._extract_images_general_approach(tree, result, request_uuid)
+
+        # Extract measurements
+        if extract_measurements:
+            self._extract_measurements(tree, result)
+        
+        # Extract materials (IKEA often has materials in specifications)
+        self._extract_materials(tree, result)
+        
+        return result
+    
+    def _extract_main_product_image(self, tree: LexborHTMLParser, result: ExtractionResult, request_uuid: str) -> None:
         """Extract the main product image"""
-        main_image_element = soup.select_one('div[data-type="MAIN_PRODUCT_IMAGE"] img.pip-image')
-        if main_image_element and main_image_element.get('srcset'):
-            srcset = main_image_element.get('srcset')
+        main_image_element = tree.css_first(self._SEL_MAIN_IMG)
+        if main_image_element and main_image_element.attributes.get('srcset'):
+            srcset = main_image_element.attributes['srcset']
             target_url = self.srcset_parser.extract_f_xl_image(srcset)
             if target_url:
                 logger.info(f"Found main product image: {target_url}")
@@ -275,15 +546,15 @@ class ProductExtractor:
                 result.images[image_id] = ImageInfo(
                     id=image_id,
                     url=target_url,
-                    alt=main_image_element.get('alt', ''),
+                    alt=main_image_element.attributes.get('alt') or '',
                     type="main"
                 )
     
-    def _extract_measurement_image(self, soup: BeautifulSoup, result: ExtractionResult, request_uuid: str) -> None:
+    def _extract_measurement_image(self, tree: LexborHTMLParser, result: ExtractionResult, request_uuid: str) -> None:
         """Extract the measurement illustration image"""
-        measurement_image_element = soup.select_one('div[data-type="MEASUREMENT_ILLUSTRATION"] img.pip-image')
-        if measurement_image_element and measurement_image_element.get('srcset'):
-            srcset = measurement_image_element.get('srcset')
+        measurement_image_element = tree.css_first(self._SEL_MEASURE_IMG)
+        if measurement_image_element and measurement_image_element.attributes.get('srcset'):
+            srcset = measurement_image_element.attributes['srcset']
             target_url = self.srcset_parser.extract_f_xl_image(srcset)
             if target_url:
                 logger.info(f"Found measurement image: {target_url}")
@@ -291,15 +562,16 @@ class ProductExtractor:
                 result.images[image_id] = ImageInfo(
                     id=image_id,
                     url=target_url,
-                    alt=measurement_image_element.get('alt', ''),
+                    alt=measurement_image_element.attributes.get('alt') or '',
                     type="measurement"
                 )
     
-    def _extract_images_general_approach(self, soup: BeautifulSoup, result: ExtractionResult, request_uuid: str) -> None:
+    def _extract_images_general_approach(self, tree: LexborHTMLParser, result: ExtractionResult, request_uuid: str) -> None:
         """Extract images using a more general approach"""
         logger.info("No specific images found, trying general approach...")
-        for i, img in enumerate(soup.select('img[srcset]')):
-            srcset = img.get('srcset')
+        found_types = set()
+        for i, img in enumerate(tree.css(self._SEL_SRCSET_IMG)):
+            srcset = img.attributes.get('srcset')
             target_url = self.srcset_parser.extract_f_xl_image(srcset)
             if target_url:
                 img_type = self._determine_image_type(img)
@@ -308,64 +580,158 @@ class ProductExtractor:
                 result.images[image_id] = ImageInfo(
                     id=image_id,
                     url=target_url,
-                    alt=img.get('alt', ''),
+                    alt=img.attributes.get('alt') or '',
                     type=img_type
                 )
+                
+                # Stop once both images the specific extractors look for are found
+                found_types.add(img_type)
+                if {"main", "measurement"} <= found_types:
+                    break
     
-    def _determine_image_type(self, img_element: BeautifulSoup) -> str:
-        """Determine the type of image based on its context"""
-        parent_html = str(img_element.parent.parent)
-        if "MAIN_PRODUCT_IMAGE" in parent_html or "main" in parent_html.lower():
+    def _determine_image_type(self, img_element: LexborNode) -> str:
+        """Determine the type of image from its own, parent and grandparent attributes"""
+        parent = img_element.parent
+        ancestors = [node for node in (parent, parent.parent if parent else None) if node is not None]
+        
+        # data-type is the explicit marker used on IKEA pages
+        for ancestor in ancestors:
+            data_type = ancestor.attributes.get('data-type') or ''
+            if "MAIN_PRODUCT_IMAGE" in data_type:
+                return "main"
+            elif "MEASUREMENT" in data_type:
+                return "measurement"
+        
+        # Otherwise fall back to class names
+        for ancestor in ancestors:
+            class_names = (ancestor.attributes.get('class') or '').lower()
+            if "main" in class_names:
+                return "main"
+            elif "measurement" in class_names:
+                return "measurement"
+        
+        # Finally look at the image's own class and alt text
+        img_attributes = img_element.attributes
+        img_hints = f"{img_attributes.get('class') or ''} {img_attributes.get('alt') or ''}".lower()
+        if "main" in img_hints:
             return "main"
-        elif "MEASUREMENT" in parent_html or "measurement" in parent_html.lower():
+        elif "measurement" in img_hints:
             return "measurement"
         return "unknown"
     
-    def _extract_measurements(self, soup: BeautifulSoup, result: ExtractionResult) -> None:
+    def _extract_measurements(self, tree: LexborHTMLParser, result: ExtractionResult) -> None:
         """Extract product measurements"""
-        dimensions_ul = soup.select_one('ul.pip-product-dimensions__dimensions-container')
+        dimensions_ul = tree.css_first(self._SEL_DIMS_UL)
         if dimensions_ul:
-            for li in dimensions_ul.select('li.pip-product-dimensions__measurement-wrapper'):
-                label_span = li.select_one('span.pip-product-dimensions__measurement-name')
-                if label_span:
-                    label = label_span.get_text(strip=True).replace(":", "")
-                    full_text = li.get_text(strip=True)
-                    value = full_text.replace(label_span.get_text(), '').strip()
-                    result.measurements[label.lower()] = value
-    
-    def process_product_page(self, url: str, output_dir: Optional[str] = None) -> Dict[str, Any]:
+            # A single query yields every label; each value is the text that follows it
+            for label_span in dimensions_ul.css(self._SEL_DIMS_LABELS):
+                label = label_span.text(strip=True).rstrip(":").strip()
+                value_parts = []
+                sibling = label_span.next
+                while sibling is not None:
+                    value_parts.append(sibling.text())
+                    sibling = sibling.next
+                result.measurements[label.lower()] = ''.join(value_parts).strip()
+    
+    def _extract_materials(self, tree: LexborHTMLParser, result: ExtractionResult) -> None:
+        """Extract product materials information"""
+        # Look for materials in product details
+        materials_section = tree.css_first(self._SEL_DETAILS)
+        if materials_section:
+            material_headers = materials_section.css(self._SEL_DETAILS_HEADERS)
+            for header in material_headers:
+                if 'material' not in header.text(strip=True).lower():
+                    continue
+                
+                # Get the paragraphs between this header and the next one
+                materials_content = []
+                sibling = header.next
+                while sibling is not None and sibling.tag not in ('h3', 'h4'):
+                    if sibling.tag == 'p':
+                        materials_content.append(sibling.text(strip=True))
+                    sibling = sibling.next
+                
+                if materials_content:
+                    result.materials['materials'] = ' '.join(materials_content)
+                    break
+    
+    async def process_product_page(
+        self,
+        url: str,
+        output_dir: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        executor: Optional[Executor] = None,
+        extract_measurements: bool = True,
+        download: bool = True
+    ) -> Dict[str, Any]:
         """
         Process a product page to extract and save high-resolution images.
         
         Args:
             url: The product page URL
             output_dir: Optional custom output directory
+            client: Optional HTTP client to use instead of the shared one
+            executor: Optional executor to parse the page in
+            extract_measurements: Whether to also extract product measurements
+            download: Whether to download the images; when False only their URLs
+                are returned and output_dir is ignored
             
         Returns:
             Dictionary with paths to downloaded images and other product information
         """
+        if not download:
+            extraction_result = await self.extract_images_from_url(
+                url, client, executor, extract_measurements
+            )
+            return extraction_result.to_dict()
+        
+        # Reuse a previous download into the same directory while its files still exist
+        cache_key = (url, output_dir, extract_measurements)
+        with self._cache_lock:
+            cached = self._download_cache.get(cache_key)
+        if cached is not None and all(os.path.exists(info.path) for info in cached.images.values()):
+            logger.info(f"Using cached download for: {url}")
+            return cached.with_request_id(cached.request_id).to_dict()
+        
         # Extract images and measurements
-        extraction_result = self.extract_images_from_url(url)
+        extraction_result = await self.extract_images_from_url(
+            url, client, executor, extract_measurements
+        )
         
         # Create a directory for the images using the request ID
         if not output_dir:
             output_dir = f"output/{extraction_result.request_id}"
         
         extraction_result.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
         
-        # Process all extracted images
-        downloaded_images = {}
+        # This download overwrites files that earlier cached results may point to
+        self._evict_downloads_into(output_dir)
         
+        # Work out where each extracted image will be saved
+        pending = []
+        type_counts: Dict[str, int] = {}
         for image_id, image_info in extraction_result.images.items():
-            # Determine filename based on image type
-            image_type = image_info.type
+            # Determine filename based on image type, numbering repeats so that
+            # concurrent downloads never write to the same file
             file_ext = os.path.splitext(image_info.url.split('?')[0])[1] or '.jpg'
-            filename = f"{image_type}{file_ext}"
-            
-            # Download the image
-            save_path = os.path.join(output_dir, filename)
-            image_path = self.image_downloader.download_image(image_info.url, save_path)
-            
+            count = type_counts.get(image_info.type, 0)
+            type_counts[image_info.type] = count + 1
+            suffix = f"-{count}" if count else ""
+            filename = f"{image_info.type}{suffix}{file_ext}"
+            pending.append((image_id, image_info, os.path.join(output_dir, filename)))
+        
+        # Download all images concurrently
+        image_paths = await self.image_downloader.download_images(
+            [(image_info.url, save_path) for _, image_info, save_path in pending],
+            client
+        )
+        
+        # Process all downloaded images
+        downloaded_images = {}
+        
+        for (image_id, image_info, _), image_path in zip(pending, image_paths):
+            image_type = image_info.type
             if image_path:
                 image_info.path = image_path
                 downloaded_images[image_type] = {
@@ -378,13 +744,140 @@ class ProductExtractor:
         
         logger.info(f"Images downloaded to directory: {output_dir}")
         
+        # Only complete downloads are worth reusing
+        if all(image_info.path for image_info in extraction_result.images.values()):
+            with self._cache_lock:
+                self._download_cache[cache_key] = extraction_result.with_request_id(extraction_result.request_id)
+        
         return extraction_result.to_dict()
+    
+    def _evict_downloads_into(self, output_dir: str) -> None:
+        """Drop cached downloads whose images were saved to output_dir"""
+        target = os.path.abspath(output_dir)
+        with self._cache_lock:
+            stale = [
+                key for key, cached in self._download_cache.items()
+                if os.path.abspath(cached.output_dir) == target
+            ]
+            for key in stale:
+                self._download_cache.pop(key, None)
+    
+    async def process_product_pages(
+        self,
+        urls: List[str],
+        client: Optional[httpx.AsyncClient] = None,
+        executor: Optional[Executor] = None,
+        extract_measurements: bool = True,
+        download: bool = True
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Process several product pages concurrently over one client and executor.
+        
+        Each page is saved to its own default output directory. While one page
+        is downloading its images, the next pages are already being fetched and
+        parsed.
+        
+        Args:
+            urls: The product page URLs
+            client: Optional HTTP client to use instead of the shared one
+            executor: Optional executor to parse the pages in
+            extract_measurements: Whether to also extract product measurements
+            download: Whether to download the images of each page
+            
+        Returns:
+            List with one entry per URL in input order: the same dictionary as
+            process_product_page returns, or the exception raised for that page
+        """
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_PAGES)
+        
+        async def bounded_process(url: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.process_product_page(
+                    url,
+                    client=client,
+                    executor=executor,
+                    extract_measurements=extract_measurements,
+                    download=download
+                )
+        
+        return await asyncio.gather(
+            *(bounded_process(url) for url in urls), return_exceptions=True
+        )
+    
+    @staticmethod
+    def _run_sync(func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """
+        Run one of the async extractor methods to completion from synchronous code.
+        
+        The shared client is bound to the event loop that created it, so each
+        call gets its own short-lived client on a fresh loop.
+        """
+        async def run() -> T:
+            async with WebPageFetcher.create_client() as client:
+                return await func(*args, client=client, **kwargs)
+        
+        return asyncio.run(run())
+    
+    def extract_images_from_url_sync(self, url: str, extract_measurements: bool = True) -> ExtractionResult:
+        """Blocking variant of extract_images_from_url for non-async callers"""
+        return self._run_sync(
+            self.extract_images_from_url, url, extract_measurements=extract_measurements
+        )
+    
+    def process_product_page_sync(
+        self,
+        url: str,
+        output_dir: Optional[str] = None,
+        extract_measurements: bool = True,
+        download: bool = True
+    ) -> Dict[str, Any]:
+        """Blocking variant of process_product_page for non-async callers"""
+        return self._run_sync(
+            self.process_product_page, url, output_dir,
+            extract_measurements=extract_measurements, download=download
+        )
+    
+    def process_product_pages_sync(
+        self,
+        urls: List[str],
+        extract_measurements: bool = True,
+        download: bool = True
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """Blocking variant of process_product_pages for non-async callers"""
+        return self._run_sync(
+            self.process_product_pages, urls,
+            extract_measurements=extract_measurements, download=download
+        )
 
 
 # Create a singleton instance for easy import
 extractor = ProductExtractor()
 
+
+def parse_and_extract(
+    html: bytes, request_uuid: str, extract_measurements: bool = True
+) -> ExtractionResult:
+    """
+    Extract product information from page HTML using the module singleton.
+    
+    This is pure CPU work with picklable inputs and output, so it can be
+    submitted to a ProcessPoolExecutor to parse pages outside the GIL.
+    
+    Args:
+        html: The raw HTML of the product page as UTF-8 bytes
+        request_uuid: Request ID used to key the extracted images
+        extract_measurements: Whether to also extract product measurements
+        
+    Returns:
+        ExtractionResult object with extracted image information
+    """
+    return extractor.extract_from_html(html, request_uuid, extract_measurements)
+
 # Export the main functions for API use
 extract_images_from_url = extractor.extract_images_from_url
 process_product_page = extractor.process_product_page
+extract_images_from_url_sync = extractor.extract_images_from_url_sync
+process_product_page_sync = extractor.process_product_page_sync
+process_product_pages = extractor.process_product_pages
+process_product_pages_sync = extractor.process_product_pages_sync
 download_image = ImageDownloader.download_image
\ No newline at end of file